@@ -1,11 +1,14 @@
-import requests
+import asyncio
+import importlib.util
+import httpx
 import random
-import time
-from datetime import datetime, timedelta
 
 # Configuration
 BASE_URL = "http://localhost:5000"  # Update this if your server runs on a different port
-SUBMIT_URL = f"{BASE_URL}/submit"
+BATCH_URL = f"{BASE_URL}/submit_batch"
+BATCH_SIZE = 50  # Entries sent per /submit_batch request
+CONCURRENCY = 16  # Maximum number of submissions in flight at once
+HTTP2 = importlib.util.find_spec("h2") is not None  # httpx only speaks HTTP/2 with the h2 package
 
 # Lists for generating random entries
 names = [
@@ -40,57 +43,89 @@ messages = [
 
 symbols = ["diya.png", "cracker.png", "rocket.png"]
 
-def generate_entry():
-    """Generate a random entry"""
-    return {
-        "name": f"{random.choice(names)} {random.choice(surnames)}",
-        "message": random.choice(messages),
-        "symbol": random.choice(symbols)
-    }
+def generate_entries(count):
+    """Generate count random entries, drawing each field's values in one batch"""
+    return [
+        {"name": f"{name} {surname}", "message": message, "symbol": symbol}
+        for name, surname, message, symbol in zip(
+            random.choices(names, k=count),
+            random.choices(surnames, k=count),
+            random.choices(messages, k=count),
+            random.choices(symbols, k=count),
+        )
+    ]
 
-def submit_entry(entry):
-    """Submit an entry to the mosaic"""
+async def submit_batch(client, batch, sem, delay=0):
+    """Submit a batch of entries to the mosaic in a single request.
+
+    Returns a tuple of (entries added, entries sent).
+    """
+    async with sem:
+        try:
+            response = await client.post(BATCH_URL, json=batch)
+            if response.is_success:
+                result = response.json()
+                print(f"Successfully added {result['added']} of {len(batch)} entries in batch")
+                added = result['added']
+            else:
+                print(f"Failed to add batch of {len(batch)} entries: {response.status_code}")
+                added = 0
+        except Exception as e:
+            print(f"Error submitting batch: {e}")
+            added = 0
+        if delay:
+            await asyncio.sleep(delay)  # Optional rate limiting per concurrent slot
+        return added, len(batch)
+
+async def server_is_up(client):
+    """Check if the server is running; HEAD avoids downloading the index page"""
     try:
-        response = requests.post(SUBMIT_URL, data=entry)
-        if response.ok:
-            print(f"Successfully added entry for {entry['name']}")
-            return True
-        else:
-            print(f"Failed to add entry for {entry['name']}: {response.status_code}")
-            return False
-    except Exception as e:
-        print(f"Error submitting entry: {e}")
+        await client.head("/", timeout=2)
+    except (httpx.ConnectError, httpx.ConnectTimeout):
         return False
+    except httpx.HTTPError:
+        pass  # Any other error still means something is answering
+    return True
 
-def main():
+async def main():
     """Main function to add entries"""
-    print("Starting to add entries to the mosaic...")
-    
-    # Number of entries to add
-    num_entries = int(input("How many entries would you like to add? "))
-    
-    # Delay between submissions (in seconds)
-    delay = float(input("Enter delay between submissions (in seconds, e.g., 0.5): "))
-    
-    successful = 0
-    for i in range(num_entries):
-        entry = generate_entry()
-        if submit_entry(entry):
-            successful += 1
-        time.sleep(delay)  # Add delay between submissions
+    # One client for the health check and all submissions. HTTP/2 multiplexes
+    # the requests over one connection when the server supports it (e.g.
+    # behind an ASGI server or proxy); the Flask/gunicorn server falls back to
+    # HTTP/1.1 keep-alive, which still reuses pooled connections. Without h2
+    # installed (plain `pip install httpx`), HTTP/1.1 is used throughout.
+    limits = httpx.Limits(max_connections=32, max_keepalive_connections=32)
+    async with httpx.AsyncClient(http2=HTTP2, base_url=BASE_URL, limits=limits) as client:
+        if not await server_is_up(client):
+            print("Error: Could not connect to the server. Make sure it's running at", BASE_URL)
+            return
+        
+        print("Starting to add entries to the mosaic...")
+        
+        # Number of entries to add
+        num_entries = int(input("How many entries would you like to add? "))
         
-        # Print progress
-        print(f"Progress: {i+1}/{num_entries} entries processed")
-    
-    print(f"\nCompleted! Successfully added {successful} entries out of {num_entries}")
+        # Delay between submissions (in seconds)
+        delay = float(input("Enter delay between submissions (in seconds, e.g., 0.5): "))
+        
+        # Group entries so each request carries up to BATCH_SIZE of them
+        entries = generate_entries(num_entries)
+        batches = [entries[i:i + BATCH_SIZE] for i in range(0, num_entries, BATCH_SIZE)]
+        
+        # Submit concurrently, bounded so the server isn't overwhelmed
+        sem = asyncio.Semaphore(CONCURRENCY)
+        tasks = [submit_batch(client, batch, sem, delay) for batch in batches]
+        successful = 0
+        processed = 0
+        for task in asyncio.as_completed(tasks):
+            added, size = await task
+            successful += added
+            processed += size
+            
+            # Print progress
+            print(f"Progress: {processed}/{num_entries} entries processed")
+        
+        print(f"\nCompleted! Successfully added {successful} entries out of {num_entries}")
 
 if __name__ == "__main__":
-    # Check if server is running
-    try:
-        response = requests.get(BASE_URL)
-        if response.ok:
-            main()
-        else:
-            print("Error: Server is not responding correctly")
-    except requests.ConnectionError:
-        print("Error: Could not connect to the server. Make sure it's running at", BASE_URL)
+    asyncio.run(main())
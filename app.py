@@ -1,55 +1,472 @@
 import os
-import json
+import copy
+import fcntl
+import gzip
+import orjson
 import logging
-import uuid
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
-from werkzeug.utils import secure_filename
+import random
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session
+from flask.json.provider import JSONProvider
+from werkzeug.exceptions import HTTPException
 from datetime import datetime
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson, used by jsonify() and request.get_json()"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype='application/json')
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 app.secret_key = os.environ.get("SESSION_SECRET", "default_secret_key_for_development")
 
 # Configuration
 UPLOAD_FOLDER = 'static'
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'svg'}
+UPLOAD_DIR = os.path.abspath(UPLOAD_FOLDER)
+SYMBOLS_DIR = f"{UPLOAD_DIR}/symbols"
+ALLOWED_EXTENSION_RE = re.compile(r'\.(?:png|jpe?g|gif|svg)\Z', re.IGNORECASE)
+HEX_COLOR_RE = re.compile(r'#(?:[0-9A-Fa-f]{3,4}|[0-9A-Fa-f]{6}|[0-9A-Fa-f]{8})')  # #RGB[A] or #RRGGBB[AA]
+UPLOAD_CHUNK_SIZE = 1 << 20  # Copy uploads in 1 MiB chunks
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # Reject request bodies over 16 MB
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 31536000  # Static URLs are versioned, so cache for a year
+
+# Ensure static and symbols directories exist; under gunicorn __main__ never runs
+os.makedirs(SYMBOLS_DIR, exist_ok=True)
 
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+# Static file mtimes used as URL versions. Known files are re-checked at most
+# every STATIC_VERSION_TTL seconds; "generation" changes whenever one of them did.
+STATIC_VERSION_TTL = 5
+_STATIC_VERSIONS = {"files": {}, "checked": 0.0, "generation": 0}
+
+def _stat_static_version(filename):
+    """Return the mtime of a static file as its URL version, or None if it is missing"""
+    # Nanoseconds, so a file replaced within the same second still gets a new URL
+    try:
+        return os.stat(os.path.join(app.static_folder, filename)).st_mtime_ns
+    except OSError:
+        return None
+
+def refresh_static_versions():
+    """Re-stat the known static files if the TTL has passed, bumping the generation on changes"""
+    now = time.monotonic()
+    if now - _STATIC_VERSIONS["checked"] < STATIC_VERSION_TTL:
+        return
+    _STATIC_VERSIONS["checked"] = now
+    files = _STATIC_VERSIONS["files"]
+    for filename, version in list(files.items()):
+        current = _stat_static_version(filename)
+        if current != version:
+            files[filename] = current
+            _STATIC_VERSIONS["generation"] += 1
+
+@app.url_defaults
+def version_static_url(endpoint, values):
+    """Add ?v=<mtime> to static URLs so a changed file gets a new URL"""
+    if endpoint != 'static' or 'filename' not in values or 'v' in values:
+        return
+    refresh_static_versions()
+    filename = values['filename']
+    files = _STATIC_VERSIONS["files"]
+    if filename not in files:
+        files[filename] = _stat_static_version(filename)
+    if files[filename] is not None:  # Missing files are left unversioned
+        values['v'] = files[filename]
+
+def json_payload(obj):
+    """Serialize obj as (JSON bytes, gzipped JSON bytes), ready to be cached and served"""
+    body = orjson.dumps(obj)
+    return body, gzip.compress(body, compresslevel=6)
+
+def conditional_json_response(etag, payload):
+    """Return a json_payload, gzipped if the client accepts it, or an empty 304 if it holds etag"""
+    body, gzipped = payload
+    response = app.response_class(mimetype='application/json')
+    if request.accept_encodings['gzip']:
+        response.set_data(gzipped)
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response.set_data(body)
+    response.vary.add('Accept-Encoding')
+    # Weak, so the tag matches both the plain and the gzipped body
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'  # Always revalidate with the ETag
+    return response.make_conditional(request)
+
+def save_upload(file, file_path):
+    """Write an uploaded file to disk in large chunks"""
+    with open(file_path, 'wb') as dst:
+        shutil.copyfileobj(file.stream, dst, length=UPLOAD_CHUNK_SIZE)
+
+# Returns the extension match (truthy) for allowed uploads, None otherwise
+allowed_file = ALLOWED_EXTENSION_RE.search
+
+# Lock files currently held by this thread, so nested locking is a no-op
+_held_locks = threading.local()
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive inter-process flock for path while modifying it"""
+    held = getattr(_held_locks, 'paths', None)
+    if held is None:
+        held = _held_locks.paths = set()
+    if path in held:
+        yield
+        return
+    with open(f"{path}.lock", 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        held.add(path)
+        try:
+            yield
+        finally:
+            held.discard(path)
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def atomic_write(path, payload):
+    """Replace path with payload so readers never see a partially written file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+DATABASE = 'mosaic.db'
+
+# Position is unique so two workers can never place entries on the same tile
+_ENTRIES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    position INTEGER NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    message TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    timestamp INTEGER NOT NULL  -- milliseconds since the epoch
+)
+"""
+
+# One connection per worker process, shared by its threads
+_DB = {"pid": None, "conn": None}
+_DB_LOCK = threading.RLock()
+
+def get_db():
+    """Get this worker's SQLite connection, opening it on first use"""
+    if _DB["pid"] != os.getpid():
+        # Autocommit mode; writes use explicit transactions (see _write_transaction)
+        conn = sqlite3.connect(DATABASE, check_same_thread=False, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')  # Readers don't block the writer
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA busy_timeout=5000')
+        # Read pages straight from the OS page cache instead of copying them in with read()
+        conn.execute('PRAGMA mmap_size=67108864')
+        conn.execute(_ENTRIES_SCHEMA)
+        _DB["pid"] = os.getpid()
+        _DB["conn"] = conn
+    return _DB["conn"]
+
+@contextmanager
+def _write_transaction():
+    """Run a block in an IMMEDIATE transaction, so other workers wait for the commit"""
+    with _DB_LOCK:
+        conn = get_db()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+def _data_version(conn):
+    """Identify the current contents of the entries table (changes on every write)"""
+    return tuple(conn.execute('SELECT MAX(id), COUNT(*) FROM entries').fetchone())
+
+# The newest max_entries submissions, oldest first
+_RECENT_ENTRIES_QUERY = (
+    'SELECT position, name, message, symbol, timestamp FROM '
+    '(SELECT * FROM entries ORDER BY id DESC LIMIT ?) ORDER BY id')
+
+def _row_to_entry(row):
+    """Convert an entries row into the submission dict used by views and the API"""
+    position, name, message, symbol, timestamp = row
+    return {
+        'id': f'tile-{position + 1}',
+        'name': name,
+        'message': message,
+        'symbol': symbol,
+        'timestamp': timestamp,
+        'position': position
+    }
+
+# Converted submissions and their serialized JSON payload, reused until the
+# entries table or max_entries changes
+_DATA_CACHE = {"key": None, "data": None, "json": None}
+
+def _refresh_data_cache(conn, max_entries):
+    """Reload _DATA_CACHE if the entries table or max_entries changed; call under _DB_LOCK"""
+    key = (_data_version(conn), max_entries)
+    if key != _DATA_CACHE["key"]:
+        rows = conn.execute(_RECENT_ENTRIES_QUERY, (max_entries,)).fetchall()
+        # Bounded to the window, so appending a new entry evicts the oldest
+        _DATA_CACHE["data"] = deque((_row_to_entry(row) for row in rows), maxlen=max_entries)
+        _DATA_CACHE["json"] = None
+        _DATA_CACHE["key"] = key
 
 def load_data():
-    """Load user submissions from data.json"""
+    """Load the most recent user submissions, up to the max_entries limit"""
+    max_entries = load_admin_settings(readonly=True).get('max_entries', 50)
+    with _DB_LOCK:
+        _refresh_data_cache(get_db(), max_entries)
+        # Shallow copy so callers can append/slice without touching the cache
+        return list(_DATA_CACHE["data"])
+
+def load_data_json(max_entries):
+    """Return (etag, json_payload) for the most recent user submissions"""
+    with _DB_LOCK:
+        _refresh_data_cache(get_db(), max_entries)
+        if _DATA_CACHE["json"] is None:
+            # Serialize once per data version; later polls reuse the same bytes
+            _DATA_CACHE["json"] = json_payload(list(_DATA_CACHE["data"]))
+        (max_id, count), max_entries = _DATA_CACHE["key"]
+        return f"{max_id}-{count}-{max_entries}", _DATA_CACHE["json"]
+
+def insert_entries(entries, max_entries):
+    """Insert new user submissions and drop the oldest beyond max_entries.
+
+    At most max_entries entries may be inserted at once. Raises
+    sqlite3.IntegrityError if another worker already took a position.
+    """
+    with _write_transaction() as conn:
+        version = _data_version(conn)
+        positions_current = _POSITIONS_STATE["key"] == (version, len(OCCUPIED_POSITIONS), max_entries)
+        # Only trim when the table would overflow, so a typical submit is a
+        # single INSERT. Trim before inserting: the new entries may reuse the
+        # positions of the entries they push out of the window, and entries
+        # outside it (e.g. after max_entries was lowered) still hold theirs.
+        trimmed = []
+        if version[1] + len(entries) > max_entries:
+            new_positions = {entry['position'] for entry in entries}
+            trimmed = [pos for pos in _trim_entries(conn, max_entries - len(entries))
+                       if pos not in new_positions]
+        conn.executemany(
+            'INSERT INTO entries (position, name, message, symbol, timestamp) '
+            'VALUES (:position, :name, :message, :symbol, :timestamp)', entries)
+        new_version = _data_version(conn)
+        
+        if positions_current:
+            # New entries already claimed their positions; free the ones of
+            # entries that were just trimmed
+            for position in trimmed:
+                _release_position(position)
+            _POSITIONS_STATE["key"] = (new_version, len(OCCUPIED_POSITIONS), max_entries)
+
+    # Once committed, extend a current submissions cache in place instead of
+    # re-reading the whole window on the next load
+    with _DB_LOCK:
+        if _DATA_CACHE["key"] == (version, max_entries):
+            _DATA_CACHE["data"].extend(
+                _row_to_entry((entry['position'], entry['name'], entry['message'],
+                               entry['symbol'], entry['timestamp']))
+                for entry in entries)
+            _DATA_CACHE["json"] = None
+            _DATA_CACHE["key"] = (new_version, max_entries)
+
+def _trim_entries(conn, keep):
+    """Delete all but the newest keep submissions, returning their positions"""
+    if keep <= 0:
+        trimmed = [row[0] for row in conn.execute('SELECT position FROM entries')]
+        conn.execute('DELETE FROM entries')
+        return trimmed
+    # Everything older than the keep-th newest id; a primary key range scan
+    older = 'id < (SELECT id FROM entries ORDER BY id DESC LIMIT 1 OFFSET ?)'
+    trimmed = [row[0] for row in conn.execute(
+        f'SELECT position FROM entries WHERE {older}', (keep - 1,))]
+    if trimmed:
+        conn.execute(f'DELETE FROM entries WHERE {older}', (keep - 1,))
+    return trimmed
+
+def clear_data():
+    """Delete all user submissions"""
+    with _write_transaction() as conn:
+        conn.execute('DELETE FROM entries')
+
+def count_entries():
+    """Count the stored user submissions"""
+    with _DB_LOCK:
+        return get_db().execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+def _legacy_timestamp_ms(timestamp):
+    """Convert an ISO 8601 timestamp from the old data files to milliseconds since the epoch"""
+    if isinstance(timestamp, int):
+        return timestamp
+    return round(datetime.fromisoformat(timestamp).timestamp() * 1000)
+
+def _read_legacy_entries(path):
+    """Read the submissions stored in an old data.jsonl/data.json file"""
+    with open(path, 'rb') as f:
+        if path.endswith('.jsonl'):
+            return [orjson.loads(line) for line in f if line.strip()]
+        return orjson.loads(f.read())
+
+def _migrate_legacy_data():
+    """Seed an empty database from the old data.jsonl/data.json files, once per database"""
+    # user_version marks a database that was already seeded. BEGIN IMMEDIATE
+    # makes the other workers wait, then see the mark and skip. The files
+    # themselves are left in place.
     try:
-        with open('data.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
-
-def save_data(data):
-    """Save user submissions to data.json"""
-    with open('data.json', 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-def get_available_positions():
-    """Get a list of available grid positions"""
-    settings = load_admin_settings()
+        with _write_transaction() as conn:
+            if conn.execute('PRAGMA user_version').fetchone()[0] >= 1:
+                return
+            if conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0] == 0:
+                for path in ('data.jsonl', 'data.json'):
+                    if not os.path.exists(path):
+                        continue
+                    conn.executemany(
+                        'INSERT OR IGNORE INTO entries (position, name, message, symbol, timestamp) '
+                        'VALUES (:position, :name, :message, :symbol, :timestamp)',
+                        [{**entry, 'timestamp': _legacy_timestamp_ms(entry['timestamp'])}
+                         for entry in _read_legacy_entries(path) if 'position' in entry])
+            conn.execute('PRAGMA user_version = 1')
+    except (OSError, KeyError, ValueError, sqlite3.Error) as e:
+        logging.error(f"Error migrating legacy data: {e}")
+
+# Occupancy bitmap of the grid (1 = taken) for the current submissions. Rebuilt
+# whenever the submissions, grid size or max_entries change; otherwise kept up
+# to date incrementally as positions are claimed and entries are inserted.
+OCCUPIED_POSITIONS = bytearray()
+_POSITIONS_STATE = {"key": None, "free": 0}
+
+# Above this share of taken tiles, random guessing gets slow, so pick from a
+# compacted list of free positions instead
+_DENSE_GRID_LOAD = 0.8
+
+def _sync_positions(data, settings):
+    """Rebuild the occupancy bitmap if it is out of date"""
     total_positions = settings['grid_rows'] * settings['grid_cols']
-    data = load_data()
-    
-    # Create set of all used positions
-    used_positions = set()
+    with _DB_LOCK:
+        version = _data_version(get_db())
+    key = (version, total_positions, settings.get('max_entries', 50))
+    if key == _POSITIONS_STATE["key"]:
+        return
+    bitmap = bytearray(total_positions)
     for entry in data:
-        if 'position' in entry:
-            used_positions.add(entry['position'])
-    
-    # Return list of available positions
-    return [pos for pos in range(total_positions) if pos not in used_positions]
+        position = entry.get('position')
+        if position is not None and position < total_positions:
+            bitmap[position] = 1
+    OCCUPIED_POSITIONS[:] = bitmap
+    _POSITIONS_STATE["key"] = key
+    _POSITIONS_STATE["free"] = total_positions - bitmap.count(1)
+
+def _release_position(position):
+    """Mark a position as free again in the occupancy bitmap"""
+    if position < len(OCCUPIED_POSITIONS) and OCCUPIED_POSITIONS[position]:
+        OCCUPIED_POSITIONS[position] = 0
+        _POSITIONS_STATE["free"] += 1
+
+def get_available_positions(data=None, settings=None):
+    """Get a list of available grid positions.
+
+    Pass already-loaded data/settings to avoid reading them again.
+    """
+    if settings is None:
+        settings = load_admin_settings()
+    if data is None:
+        data = load_data()
+    with _DB_LOCK:
+        _sync_positions(data, settings)
+        return [pos for pos, taken in enumerate(OCCUPIED_POSITIONS) if not taken]
+
+def claim_position(data, settings):
+    """Reserve a random free grid position, or return None if the grid is full"""
+    with _DB_LOCK:
+        _sync_positions(data, settings)
+        total_positions = len(OCCUPIED_POSITIONS)
+        free = _POSITIONS_STATE["free"]
+        if not free:
+            return None
+        if free > total_positions * (1 - _DENSE_GRID_LOAD):
+            # Sparse grid: a random guess is free most of the time
+            position = random.randrange(total_positions)
+            while OCCUPIED_POSITIONS[position]:
+                position = random.randrange(total_positions)
+        else:
+            position = random.choice([pos for pos, taken in enumerate(OCCUPIED_POSITIONS) if not taken])
+        OCCUPIED_POSITIONS[position] = 1
+        _POSITIONS_STATE["free"] -= 1
+        return position
+
+def add_entries(entries, settings):
+    """Place new submissions on random free positions and store them.
+
+    Returns the accepted entries; any that don't fit on the grid are left out.
+    As with one submit after another, each entry pushes the oldest one out of
+    the max_entries window and frees its tile for the rest of the batch, so
+    entries pushed out by later ones in the same batch are accepted but never
+    stored.
+    """
+    max_entries = settings.get('max_entries', 50)
+    for attempt in range(5):
+        with _DB_LOCK:
+            data = load_data()
+            window = deque(entry['position'] for entry in data)
+            placed = []
+            for entry in entries:
+                position = claim_position(data, settings)
+                if position is None:
+                    break
+                placed.append({'id': f'tile-{position + 1}', **entry, 'position': position})
+                window.append(position)
+                if len(window) > max_entries:
+                    _release_position(window.popleft())
+            if not placed:
+                return []
+            try:
+                insert_entries(placed[-max_entries:], max_entries)
+                return placed
+            except sqlite3.IntegrityError:
+                # Another worker took one of the positions first; resync and retry
+                _POSITIONS_STATE["key"] = None
+    raise RuntimeError('Could not find free positions for the new entries')
+
+# Parsed admin settings, reused until admin_settings.json changes on disk
+# valid_symbols is stored as (settings dict, frozenset) so the set is always
+# tied to the exact snapshot it was computed from
+_SETTINGS_CACHE = {"stamp": None, "data": None, "valid_symbols": (None, frozenset())}
+
+def _settings_stamp(stat_result):
+    """Identify a version of admin_settings.json from its stat result"""
+    # mtime alone can repeat on coarse-timestamp filesystems; every save goes
+    # through os.replace, so the inode changes reliably
+    return (stat_result.st_mtime_ns, stat_result.st_ino, stat_result.st_size)
+
+def load_admin_settings(readonly=False):
+    """Load admin settings from admin_settings.json (cached until the file changes)"""
+    # Callers get a copy so they can modify it freely before saving; read-only
+    # callers on the hot path get the cached dict itself and must not mutate it
+    try:
+        stamp = _settings_stamp(os.stat('admin_settings.json'))
+        if stamp == _SETTINGS_CACHE["stamp"] and _SETTINGS_CACHE["data"] is not None:
+            if readonly:
+                return _SETTINGS_CACHE["data"]
+            return copy.deepcopy(_SETTINGS_CACHE["data"])
+    except FileNotFoundError:
+        pass
 
-def load_admin_settings():
-    """Load admin settings from admin_settings.json"""
     default_settings = {
         "logo_filename": "logo.png",
         "short_logo_filename": "logo_20250902_001306.png",  # Default short logo
@@ -100,8 +517,9 @@ def load_admin_settings():
         ]
     }
     try:
-        with open('admin_settings.json', 'r', encoding='utf-8') as f:
-            settings = json.load(f)
+        with open('admin_settings.json', 'rb') as f:
+            stamp = _settings_stamp(os.fstat(f.fileno()))
+            settings = orjson.loads(f.read())
             # Ensure all required keys exist
             for key, value in default_settings.items():
                 if key not in settings:
@@ -110,92 +528,185 @@ def load_admin_settings():
                 elif key == 'celebration_animations' and not settings[key]:
                     # If celebration_animations is empty, use default values
                     settings[key] = value
-            return settings
-    except (FileNotFoundError, json.JSONDecodeError):
+            _SETTINGS_CACHE["stamp"] = stamp
+            _SETTINGS_CACHE["data"] = settings
+            _SETTINGS_CACHE["valid_symbols"] = (settings, frozenset(s['filename'] for s in settings['symbols']))
+            return settings if readonly else copy.deepcopy(settings)
+    except (FileNotFoundError, orjson.JSONDecodeError):
         save_admin_settings(default_settings)
         return default_settings
 
 def save_admin_settings(settings):
     """Save admin settings to admin_settings.json"""
-    with open('admin_settings.json', 'w', encoding='utf-8') as f:
-        json.dump(settings, f, ensure_ascii=False, indent=2)
-
-@app.route('/')
-def index():
-    """Render the submission form"""
-    settings = load_admin_settings()
+    with file_lock('admin_settings.json'):
+        atomic_write('admin_settings.json', orjson.dumps(settings, option=orjson.OPT_INDENT_2))
+        stamp = _settings_stamp(os.stat('admin_settings.json'))
+    # The file now holds exactly these settings, so cache them rather than re-reading it
+    _SETTINGS_CACHE["stamp"] = stamp
+    cached = copy.deepcopy(settings)
+    _SETTINGS_CACHE["data"] = cached
+    _SETTINGS_CACHE["valid_symbols"] = (cached, frozenset(s['filename'] for s in cached['symbols']))
+
+# Serialized settings for the API, reused until admin_settings.json changes
+_SETTINGS_JSON_CACHE = {"stamp": None, "json": None}
+
+def load_admin_settings_json():
+    """Return (etag, json_payload) for the current admin settings"""
+    stamp = _settings_stamp(os.stat('admin_settings.json'))
+    if stamp != _SETTINGS_JSON_CACHE["stamp"]:
+        _SETTINGS_JSON_CACHE["json"] = json_payload(load_admin_settings(readonly=True))
+        _SETTINGS_JSON_CACHE["stamp"] = stamp
+    return '-'.join(map(str, stamp)), _SETTINGS_JSON_CACHE["json"]
+
+def get_valid_symbols(settings):
+    """Get the allowed symbol filenames for a settings snapshot (precomputed for the cached one)"""
+    cached_settings, valid_symbols = _SETTINGS_CACHE["valid_symbols"]
+    if cached_settings is settings:
+        return valid_symbols
+    return frozenset(s['filename'] for s in settings['symbols'])
+
+def validate_entry(name, message, symbol, valid_symbols):
+    """Validate a submission, returning an error message or None if valid"""
+    if not name or not message or not symbol:
+        return 'All fields are required!'
+    
+    if len(name) > 50:
+        return 'Name must be 50 characters or less!'
+    
+    if len(message) > 200:
+        return 'Message must be 200 characters or less!'
+    
+    # Validate symbol is in allowed list
+    if symbol not in valid_symbols:
+        return 'Invalid symbol selected!'
+    
+    return None
+
+_migrate_legacy_data()
+
+# How each form/JSON handler reports an unexpected error: the page to redirect
+# back to with a flashed message, or None to answer with a JSON 500
+_ENDPOINT_ERRORS = {
+    'submit': ('index', 'An error occurred while submitting your entry.'),
+    'submit_batch': (None, 'An error occurred while submitting the entries.'),
+    'upload_color_scheme': ('admin', 'An error occurred while uploading the color scheme.'),
+    'upload_logo': ('admin', 'An error occurred while uploading the logo.'),
+    'update_settings': ('admin', 'An error occurred while updating settings.'),
+    'add_symbol': ('admin', 'An error occurred while adding the symbol.'),
+    'remove_symbol': ('admin', 'An error occurred while removing the symbol.'),
+    'clear_entries': ('admin', 'An error occurred while clearing entries.'),
+}
+
+@app.errorhandler(Exception)
+def handle_unexpected_error(e):
+    """Log an error raised by a form/JSON handler and answer the way its clients expect"""
+    if isinstance(e, HTTPException):
+        return e
+    if request.endpoint not in _ENDPOINT_ERRORS:
+        # Let Flask's own handling run (traceback logging, debugger, test propagation)
+        raise e
+    logging.exception(f"Error in {request.endpoint}: {e}")
+    redirect_endpoint, message = _ENDPOINT_ERRORS[request.endpoint]
+    if redirect_endpoint is None:
+        return jsonify({'error': message}), 500
+    flash(message, 'error')
+    return redirect(url_for(redirect_endpoint))
+
+def _render_index():
+    """Render the submission form template"""
+    settings = load_admin_settings(readonly=True)
     return render_template('index.html', 
                          symbols=settings['symbols'], 
                          admin_settings=settings,
                          settings=settings,  # Pass settings both ways for compatibility
                          body_class='entry-page')
 
+# Rendered submission form as ((settings stamp, static generation), html),
+# reused until the settings or one of the static files it links to change
+_INDEX_CACHE = {"page": (None, None)}
+
+@app.route('/')
+def index():
+    """Render the submission form"""
+    # Pages showing flash messages are per-visitor, so only the plain form is cached
+    if '_flashes' in session:
+        return _render_index()
+    try:
+        # Read the key before rendering: if anything changes meanwhile, the stale key forces a re-render
+        refresh_static_versions()
+        key = (_settings_stamp(os.stat('admin_settings.json')), _STATIC_VERSIONS["generation"])
+    except FileNotFoundError:
+        return _render_index()
+    cached_key, html = _INDEX_CACHE["page"]
+    if cached_key != key:
+        html = _render_index()
+        _INDEX_CACHE["page"] = (key, html)
+    return html
+
 @app.route('/submit', methods=['POST'])
 def submit():
     """Handle form submission"""
-    try:
-        name = request.form.get('name', '').strip()
-        message = request.form.get('message', '').strip()
-        symbol = request.form.get('symbol', '').strip()
-        
-        # Validation
-        if not name or not message or not symbol:
-            flash('All fields are required!', 'error')
-            return redirect(url_for('index'))
-        
-        if len(name) > 50:
-            flash('Name must be 50 characters or less!', 'error')
-            return redirect(url_for('index'))
-        
-        if len(message) > 200:
-            flash('Message must be 200 characters or less!', 'error')
-            return redirect(url_for('index'))
-        
-        # Validate symbol is in allowed list
-        settings = load_admin_settings()
-        valid_symbols = [s['filename'] for s in settings['symbols']]
-        if symbol not in valid_symbols:
-            flash('Invalid symbol selected!', 'error')
-            return redirect(url_for('index'))
+    name = request.form.get('name', '').strip()
+    message = request.form.get('message', '').strip()
+    symbol = request.form.get('symbol', '').strip()
+    
+    # Validation
+    settings = load_admin_settings(readonly=True)
+    error = validate_entry(name, message, symbol, get_valid_symbols(settings))
+    if error:
+        flash(error, 'error')
+        return redirect(url_for('index'))
+    
+    # Store the entry on a randomly selected free position
+    new_entry = {
+        'name': name,
+        'message': message,
+        'symbol': symbol,
+        'timestamp': time.time_ns() // 1_000_000  # Milliseconds, so JS clients read it exactly
+    }
+    if not add_entries([new_entry], settings):
+        flash('The mosaic is currently full!', 'error')
+        return redirect(url_for('index'))
+    
+    flash('Your submission has been added to the mosaic!', 'success')
+    return redirect(url_for('index'))
+
+@app.route('/submit_batch', methods=['POST'])
+def submit_batch():
+    """Handle a JSON array of submissions in a single transaction"""
+    entries = request.get_json(silent=True)
+    if not isinstance(entries, list):
+        return jsonify({'error': 'Expected a JSON array of entries'}), 400
+    
+    settings = load_admin_settings(readonly=True)
+    valid_symbols = get_valid_symbols(settings)
+    
+    new_entries = []
+    rejected = 0
+    for entry in entries:
+        if not isinstance(entry, dict):
+            rejected += 1
+            continue
+        name = str(entry.get('name', '')).strip()
+        message = str(entry.get('message', '')).strip()
+        symbol = str(entry.get('symbol', '')).strip()
         
-        # Get available positions
-        available_positions = get_available_positions()
-        if not available_positions:
-            flash('The mosaic is currently full!', 'error')
-            return redirect(url_for('index'))
-            
-        # Randomly select a position from available positions
-        import random
-        position = random.choice(available_positions)
+        if validate_entry(name, message, symbol, valid_symbols):
+            rejected += 1
+            continue
         
-        # Create new entry with unique ID and assigned position
-        new_entry = {
-            'id': f'tile-{position + 1}',  # Position-based ID for better tracking
+        new_entries.append({
             'name': name,
             'message': message,
             'symbol': symbol,
-            'timestamp': datetime.now().isoformat(),
-            'position': position  # Store the assigned position
-        }
-        
-        # Load existing data and add new entry
-        data = load_data()
-        data.append(new_entry)
-        
-        # Apply max entries limit
-        max_entries = settings.get('max_entries', 50)
-        if len(data) > max_entries:
-            data = data[-max_entries:]  # Keep only the most recent entries
-        
-        save_data(data)
-        
-        flash('Your submission has been added to the mosaic!', 'success')
-        return redirect(url_for('index'))
-        
-    except Exception as e:
-        logging.error(f"Error in submit: {e}")
-        flash('An error occurred while submitting your entry.', 'error')
-        return redirect(url_for('index'))
+            'timestamp': time.time_ns() // 1_000_000
+        })
+
+    # Entries that don't fit on the grid any more are rejected
+    added = add_entries(new_entries, settings) if new_entries else []
+    rejected += len(new_entries) - len(added)
+
+    return jsonify({'added': len(added), 'rejected': rejected})
 
 @app.route('/mosaic')
 def mosaic():
@@ -220,229 +731,216 @@ def mosaic():
 @app.route('/admin')
 def admin():
     """Render the admin interface"""
-    settings = load_admin_settings()
-    data = load_data()
+    settings = load_admin_settings(readonly=True)
+    # Only the newest max_entries rows are shown; older ones are trimmed on the next submit
+    entry_count = min(count_entries(), settings.get('max_entries', 50))
     return render_template('admin.html', 
                          settings=settings,
                          admin_settings=settings,  # Pass settings both ways for compatibility
-                         entry_count=len(data),
+                         entry_count=entry_count,
                          body_class='admin-page')
 
 @app.route('/admin/upload-color-scheme', methods=['POST'])
 def upload_color_scheme():
     """Handle color scheme upload"""
-    try:
-        if 'color_scheme' not in request.files:
-            flash('No file selected!', 'error')
-            return redirect(url_for('admin'))
-        
-        file = request.files['color_scheme']
-        if file.filename == '':
-            flash('No file selected!', 'error')
-            return redirect(url_for('admin'))
-        
-        if file and file.filename.endswith('.json'):
-            try:
-                # Read and validate the color scheme
-                color_scheme = json.load(file)
-                
-                # Validate required sections and fields
-                required_sections = ['submission_page', 'mosaic_page']
-                required_submission_fields = ['background', 'text', 'button', 'button_text']
-                required_mosaic_fields = ['background', 'text', 'tile_background', 'tile_text', 'tile_border']
-                
-                # Check structure
-                if not all(section in color_scheme for section in required_sections):
-                    flash('Invalid color scheme format! Missing required sections.', 'error')
-                    return redirect(url_for('admin'))
-                
-                # Check submission page fields
-                if not all(field in color_scheme['submission_page'] for field in required_submission_fields):
-                    flash('Invalid submission page color scheme! Missing required fields.', 'error')
-                    return redirect(url_for('admin'))
-                
-                # Check mosaic page fields
-                if not all(field in color_scheme['mosaic_page'] for field in required_mosaic_fields):
-                    flash('Invalid mosaic page color scheme! Missing required fields.', 'error')
-                    return redirect(url_for('admin'))
-                
-                # Validate color codes (simple hex validation)
-                for section in color_scheme.values():
-                    for color in section.values():
-                        if not color.startswith('#') or not all(c in '0123456789ABCDEFabcdef' for c in color[1:]):
-                            flash('Invalid color code format! Use hex colors (e.g., #FF0000).', 'error')
-                            return redirect(url_for('admin'))
-                
-                # Update settings with new color scheme
+    if 'color_scheme' not in request.files:
+        flash('No file selected!', 'error')
+        return redirect(url_for('admin'))
+    
+    file = request.files['color_scheme']
+    if file.filename == '':
+        flash('No file selected!', 'error')
+        return redirect(url_for('admin'))
+    
+    if file and file.filename.endswith('.json'):
+        try:
+            # Read and validate the color scheme
+            color_scheme = orjson.loads(file.read())
+            
+            # Validate required sections and fields
+            required_sections = ['submission_page', 'mosaic_page']
+            required_submission_fields = ['background', 'text', 'button', 'button_text']
+            required_mosaic_fields = ['background', 'text', 'tile_background', 'tile_text', 'tile_border']
+            
+            # Check structure
+            if not all(section in color_scheme for section in required_sections):
+                flash('Invalid color scheme format! Missing required sections.', 'error')
+                return redirect(url_for('admin'))
+            
+            # Check submission page fields
+            if not all(field in color_scheme['submission_page'] for field in required_submission_fields):
+                flash('Invalid submission page color scheme! Missing required fields.', 'error')
+                return redirect(url_for('admin'))
+            
+            # Check mosaic page fields
+            if not all(field in color_scheme['mosaic_page'] for field in required_mosaic_fields):
+                flash('Invalid mosaic page color scheme! Missing required fields.', 'error')
+                return redirect(url_for('admin'))
+            
+            # Validate color codes (simple hex validation)
+            for section in color_scheme.values():
+                for color in section.values():
+                    if not isinstance(color, str) or not HEX_COLOR_RE.fullmatch(color):
+                        flash('Invalid color code format! Use hex colors (e.g., #FF0000).', 'error')
+                        return redirect(url_for('admin'))
+            
+            # Update settings with new color scheme
+            with file_lock('admin_settings.json'):
                 settings = load_admin_settings()
                 settings['color_scheme'] = color_scheme
                 save_admin_settings(settings)
-                
-                flash('Color scheme updated successfully!', 'success')
-            except json.JSONDecodeError:
-                flash('Invalid JSON file!', 'error')
-        else:
-            flash('Invalid file type! Please upload a JSON file.', 'error')
             
-    except Exception as e:
-        logging.error(f"Error uploading color scheme: {e}")
-        flash('An error occurred while uploading the color scheme.', 'error')
-    
+            flash('Color scheme updated successfully!', 'success')
+        except orjson.JSONDecodeError:
+            flash('Invalid JSON file!', 'error')
+    else:
+        flash('Invalid file type! Please upload a JSON file.', 'error')
+
     return redirect(url_for('admin'))
 
 @app.route('/admin/upload-logo', methods=['POST'])
 def upload_logo():
     """Handle logo upload"""
-    try:
-        if 'logo' not in request.files:
-            flash('No file selected!', 'error')
-            return redirect(url_for('admin'))
-        
-        file = request.files['logo']
-        if file.filename == '':
-            flash('No file selected!', 'error')
-            return redirect(url_for('admin'))
+    if 'logo' not in request.files:
+        flash('No file selected!', 'error')
+        return redirect(url_for('admin'))
+    
+    file = request.files['logo']
+    if file.filename == '':
+        flash('No file selected!', 'error')
+        return redirect(url_for('admin'))
+    
+    logo_type = request.form.get('logo_type', 'main')  # 'main' or 'short'
+    
+    ext_match = file and file.filename and allowed_file(file.filename)
+    if ext_match:
+        # Add timestamp to avoid conflicts; only the matched extension comes from the client
+        filename = f"logo_{time.time_ns()}{ext_match.group()}"
         
-        logo_type = request.form.get('logo_type', 'main')  # 'main' or 'short'
+        file_path = f"{UPLOAD_DIR}/{filename}"
+        save_upload(file, file_path)
         
-        if file and file.filename and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            # Add timestamp to avoid conflicts
-            name, ext = os.path.splitext(filename)
-            filename = f"logo_{datetime.now().strftime('%Y%m%d_%H%M%S')}{ext}"
-            
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(file_path)
-            
-            # Update admin settings
+        # Update admin settings
+        with file_lock('admin_settings.json'):
             settings = load_admin_settings()
             if logo_type == 'short':
                 settings['short_logo_filename'] = filename
             else:
                 settings['logo_filename'] = filename
             save_admin_settings(settings)
-            
-            flash(f'{"Short" if logo_type == "short" else "Main"} logo uploaded successfully!', 'success')
-        else:
-            flash('Invalid file type! Please upload PNG, JPG, JPEG, GIF, or SVG files.', 'error')
-            
-    except Exception as e:
-        logging.error(f"Error uploading logo: {e}")
-        flash('An error occurred while uploading the logo.', 'error')
-    
+        
+        flash(f'{"Short" if logo_type == "short" else "Main"} logo uploaded successfully!', 'success')
+    else:
+        flash('Invalid file type! Please upload PNG, JPG, JPEG, GIF, or SVG files.', 'error')
+
     return redirect(url_for('admin'))
 
 @app.route('/admin/update-settings', methods=['POST'])
 def update_settings():
     """Update admin settings"""
-    try:
+    # Read and validate the whole form first: parsing the body reads from the
+    # socket, which may yield to another greenlet, so it must not happen under the lock
+    header_text = request.form.get('header_text', '').strip()
+    max_entries = request.form.get('max_entries', type=int)
+    grid_mode = request.form.get('grid_mode', 'auto')
+    grid_rows = grid_cols = None
+    if grid_mode == 'manual':
+        grid_rows = request.form.get('grid_rows', type=int)
+        grid_cols = request.form.get('grid_cols', type=int)
+    celebration_animations = request.form.getlist('celebration_animations[]')
+    # Default to confetti if none selected
+    if not celebration_animations:
+        celebration_animations = ['confetti']
+    # Validate animation types
+    valid_animations = ['confetti', 'fireworks', 'diwali', 'sparkle-rain', 'flower-burst', 'rangoli']
+    celebration_animations = [anim for anim in celebration_animations if anim in valid_animations]
+
+    # Hold the settings lock across load/modify/save so concurrent updates aren't lost
+    with file_lock('admin_settings.json'):
         settings = load_admin_settings()
-        
+    
         # Update header text
-        header_text = request.form.get('header_text', '').strip()
         if header_text:
             settings['header_text'] = header_text
-        
+    
         # Update max entries
-        max_entries = request.form.get('max_entries', type=int)
         if max_entries and max_entries > 0:
             settings['max_entries'] = max_entries
-        
+    
         # Update grid settings
-        grid_mode = request.form.get('grid_mode', 'auto')
         settings['grid_mode'] = grid_mode
-        
-        if grid_mode == 'manual':
-            grid_rows = request.form.get('grid_rows', type=int)
-            grid_cols = request.form.get('grid_cols', type=int)
-            
-            if grid_rows and grid_rows > 0 and grid_rows <= 50:
-                settings['grid_rows'] = grid_rows
-            if grid_cols and grid_cols > 0 and grid_cols <= 50:
-                settings['grid_cols'] = grid_cols
-        
+        if grid_rows and grid_rows > 0 and grid_rows <= 50:
+            settings['grid_rows'] = grid_rows
+        if grid_cols and grid_cols > 0 and grid_cols <= 50:
+            settings['grid_cols'] = grid_cols
+    
         # Update celebration animations
-        celebration_animations = request.form.getlist('celebration_animations[]')
-        # Default to confetti if none selected
-        if not celebration_animations:
-            celebration_animations = ['confetti']
-        # Validate animation types
-        valid_animations = ['confetti', 'fireworks', 'diwali', 'sparkle-rain', 'flower-burst', 'rangoli']
-        celebration_animations = [anim for anim in celebration_animations if anim in valid_animations]
         settings['celebration_animations'] = celebration_animations
-        
-        save_admin_settings(settings)
-        flash('Settings updated successfully!', 'success')
-        
-    except Exception as e:
-        logging.error(f"Error updating settings: {e}")
-        flash('An error occurred while updating settings.', 'error')
     
+        save_admin_settings(settings)
+    flash('Settings updated successfully!', 'success')
+
     return redirect(url_for('admin'))
 
 @app.route('/admin/add-symbol', methods=['POST'])
 def add_symbol():
     """Add a new celebratory symbol"""
-    try:
-        if 'symbol_file' not in request.files:
-            flash('Symbol image file is required!', 'error')
-            return redirect(url_for('admin'))
-
-        file = request.files['symbol_file']
-        label = request.form.get('label', '').strip()
+    if 'symbol_file' not in request.files:
+        flash('Symbol image file is required!', 'error')
+        return redirect(url_for('admin'))
 
-        if file.filename == '' or not label:
-            flash('Both symbol file and label are required!', 'error')
-            return redirect(url_for('admin'))
-
-        if not file.filename.lower().endswith('.png'):
-            flash('Only PNG files are allowed for symbols!', 'error')
-            return redirect(url_for('admin'))
+    file = request.files['symbol_file']
+    label = request.form.get('label', '').strip()
 
-        settings = load_admin_settings()
+    if file.filename == '' or not label:
+        flash('Both symbol file and label are required!', 'error')
+        return redirect(url_for('admin'))
 
-        # Create a unique filename for the symbol
-        filename = secure_filename(f"symbol_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
+    if not file.filename.lower().endswith('.png'):
+        flash('Only PNG files are allowed for symbols!', 'error')
+        return redirect(url_for('admin'))
 
-        # Ensure the symbols directory exists
-        symbols_dir = os.path.join(app.config['UPLOAD_FOLDER'], 'symbols')
-        os.makedirs(symbols_dir, exist_ok=True)
+    # Create a unique filename for the symbol
+    filename = f"symbol_{time.time_ns()}.png"
 
-        # Save the file
-        file_path = os.path.join(symbols_dir, filename)
-        file.save(file_path)
+    # Save the file
+    file_path = f"{SYMBOLS_DIR}/{filename}"
+    save_upload(file, file_path)
 
-        # Add the symbol to settings
+    # Add the symbol to settings
+    with file_lock('admin_settings.json'):
+        settings = load_admin_settings()
         settings['symbols'].append({'filename': filename, 'label': label})
         save_admin_settings(settings)
 
-        flash('Symbol added successfully!', 'success')
-
-    except Exception as e:
-        logging.error(f"Error adding symbol: {e}")
-        flash('An error occurred while adding the symbol.', 'error')
+    flash('Symbol added successfully!', 'success')
 
     return redirect(url_for('admin'))
 
 @app.route('/admin/remove-symbol', methods=['POST'])
 def remove_symbol():
     """Remove a celebratory symbol"""
-    try:
-        filename = request.form.get('filename', '').strip()
+    filename = request.form.get('filename', '').strip()
 
-        if not filename:
-            flash('Invalid symbol!', 'error')
-            return redirect(url_for('admin'))
+    if not filename:
+        flash('Invalid symbol!', 'error')
+        return redirect(url_for('admin'))
 
+    with file_lock('admin_settings.json'):
         settings = load_admin_settings()
 
+        # Only known symbols may be removed; this also keeps the path below inside symbols/
+        if filename not in get_valid_symbols(settings):
+            flash('Invalid symbol!', 'error')
+            return redirect(url_for('admin'))
+
         # Don't allow removing all symbols
         if len(settings['symbols']) <= 1:
             flash('Cannot remove the last symbol!', 'error')
             return redirect(url_for('admin'))
 
         # Find and remove the symbol file
-        symbol_path = os.path.join(app.config['UPLOAD_FOLDER'], 'symbols', filename)
+        symbol_path = f"{SYMBOLS_DIR}/{filename}"
         try:
             os.remove(symbol_path)
         except FileNotFoundError:
@@ -453,32 +951,25 @@ def remove_symbol():
         settings['symbols'] = [s for s in settings['symbols'] if s['filename'] != filename]
         save_admin_settings(settings)
 
-        flash('Symbol removed successfully!', 'success')
-
-    except Exception as e:
-        logging.error(f"Error removing symbol: {e}")
-        flash('An error occurred while removing the symbol.', 'error')
+    flash('Symbol removed successfully!', 'success')
 
     return redirect(url_for('admin'))
 
 @app.route('/admin/clear-entries', methods=['POST'])
 def clear_entries():
     """Clear all user entries"""
-    try:
-        save_data([])
-        flash('All entries have been cleared!', 'success')
-    except Exception as e:
-        logging.error(f"Error clearing entries: {e}")
-        flash('An error occurred while clearing entries.', 'error')
-    
+    clear_data()
+    flash('All entries have been cleared!', 'success')
+
     return redirect(url_for('admin'))
 
 @app.route('/api/entries')
 def api_entries():
     """API endpoint to get current entries (for real-time updates)"""
     try:
-        data = load_data()
-        return jsonify(data)
+        max_entries = load_admin_settings(readonly=True).get('max_entries', 50)
+        etag, payload = load_data_json(max_entries)
+        return conditional_json_response(etag, payload)
     except Exception as e:
         logging.error(f"Error in api_entries: {e}")
         return jsonify([])
@@ -487,14 +978,11 @@ def api_entries():
 def api_admin_settings():
     """API endpoint to get current admin settings (for logo updates)"""
     try:
-        settings = load_admin_settings()
-        return jsonify(settings)
+        etag, payload = load_admin_settings_json()
+        return conditional_json_response(etag, payload)
     except Exception as e:
         logging.error(f"Error in api_admin_settings: {e}")
         return jsonify({"logo_filename": "logo.png", "max_entries": 50, "symbols": []})
 
 if __name__ == '__main__':
-    # Ensure static and symbols directories exist
-    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-    os.makedirs(os.path.join(UPLOAD_FOLDER, 'symbols'), exist_ok=True)
     app.run(host='0.0.0.0', port=5000, debug=True)